@@ -5,7 +5,11 @@ This is the entry point for the application.
 It provides a simple interactive chat interface.
 """
 
+import os
 import sys
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
 from src.vector_store import VectorStore
 from src.agent import KitchenInventoryAgent
 
@@ -24,6 +28,32 @@ def print_welcome():
     print("="*60 + "\n")
 
 
+def setup_logging():
+    """
+    Route the agent's debug output through a background thread.
+    
+    Log records are queued and written to stderr by a listener thread,
+    so a slow terminal never blocks query processing. Debug output
+    (tool decisions and results) is shown when KITCHEN_AGENT_DEBUG=1.
+    
+    Returns:
+        The started QueueListener (stop it on exit to flush the queue)
+    """
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, logging.StreamHandler())
+    
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.WARNING)
+    
+    # Only our own modules (src.*) log at debug level
+    if os.environ.get("KITCHEN_AGENT_DEBUG"):
+        logging.getLogger("src").setLevel(logging.DEBUG)
+    
+    listener.start()
+    return listener
+
+
 def main():
     """
     Main function to run the agent.
@@ -34,57 +64,64 @@ def main():
     3. Initialize agent
     4. Start interactive loop
     """
-    print("Initializing Kitchen Inventory Agent...")
-    
-    # Initialize vector store
+    log_listener = setup_logging()
     try:
-        vector_store = VectorStore()
-        vector_store.load_knowledge_base()
-        print("✓ Vector store initialized\n")
-    except Exception as e:
-        print(f"Error initializing vector store: {e}")
-        print("Make sure Ollama is running: ollama serve")
-        sys.exit(1)
-    
-    # Initialize agent
-    try:
-        agent = KitchenInventoryAgent(vector_store)
-        print("✓ Agent initialized\n")
-    except Exception as e:
-        print(f"Error initializing agent: {e}")
-        sys.exit(1)
-    
-    # Display welcome message
-    print_welcome()
-    
-    # Interactive loop
-    while True:
+        print("Initializing Kitchen Inventory Agent...")
+        
+        # Initialize vector store
         try:
-            # Get user input
-            user_input = input("You: ").strip()
-            
-            # Check for exit commands
-            if user_input.lower() in ['quit', 'exit', 'bye']:
-                print("\nThank you for using Kitchen Inventory Assistant!")
-                break
-            
-            # Skip empty input
-            if not user_input:
-                continue
-            
-            # Process query
-            response = agent.chat(user_input)
-            
-            # Display response
-            print(f"\nAgent: {response}\n")
-            print("-"*60 + "\n")
+            vector_store = VectorStore()
+            vector_store.load_knowledge_base()
+            print("✓ Vector store initialized\n")
+        except Exception as e:
+            print(f"Error initializing vector store: {e}")
+            print("Make sure Ollama is running: ollama serve")
+            sys.exit(1)
         
-        except KeyboardInterrupt:
-            print("\n\nSession ended by user.")
-            break
+        # Initialize agent
+        try:
+            agent = KitchenInventoryAgent(vector_store)
+            print("✓ Agent initialized\n")
         except Exception as e:
-            print(f"\nError: {e}")
-            print("Please try again.\n")
+            print(f"Error initializing agent: {e}")
+            sys.exit(1)
+        
+        # Display welcome message
+        print_welcome()
+        
+        # Interactive loop
+        while True:
+            try:
+                # Get user input
+                user_input = input("You: ").strip()
+                
+                # Check for exit commands
+                if user_input.lower() in ['quit', 'exit', 'bye']:
+                    print("\nThank you for using Kitchen Inventory Assistant!")
+                    break
+                
+                # Skip empty input
+                if not user_input:
+                    continue
+                
+                # Process query (runs any tools before returning)
+                response = agent.chat_stream(user_input)
+                
+                # Display response as it is generated
+                print("\nAgent: ", end="", flush=True)
+                for token in response:
+                    print(token, end="", flush=True)
+                print("\n")
+            
+            except KeyboardInterrupt:
+                print("\n\nSession ended by user.")
+                break
+            except Exception as e:
+                print(f"\nError: {e}")
+                print("Please try again.\n")
+    finally:
+        # Flush any queued log output before exiting (also on sys.exit)
+        log_listener.stop()
 
 
 if __name__ == "__main__":
@@ -3,17 +3,77 @@ Main Agent Logic for Kitchen Inventory Assistant
 Updated for Python 3.14 compatibility
 """
 
+import os
 import re
+import asyncio
+import contextlib
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+import httpx
 import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from src.prompts import (
     get_system_prompt,
     get_tool_selection_prompt,
     format_context,
-    get_anti_hallucination_instructions,
-    get_tool_descriptions
+    get_anti_hallucination_instructions
 )
 from src.tools import InventoryTools
+from src.cache import LRUCache, SemanticCache, normalize_query
+from src.batching import BatchCollector
+
+
+# Debug output (tool decisions and results). Off by default - see main.py
+logger = logging.getLogger(__name__)
+
+# Group concurrent async LLM requests into batches (see src/batching.py)
+BATCH_MODE = os.environ.get("KITCHEN_AGENT_BATCH_MODE", "").lower() in ("1", "true", "yes")
+
+
+# Matches a tool call like:
+#   TOOL: search_inventory
+#   PARAMETERS: {"query": "olive oil"}
+_TOOL_RE = re.compile(
+    r'TOOL:\s*(\w+)\s*(?:PARAMETERS:\s*(\{.*?\}))?',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Keyword patterns for the fast tool router (see _fast_router)
+_INV_RE = re.compile(r'\b(how\s+much|stock|inventory|left)\b', re.IGNORECASE)
+# (minus and slash need spaces around them, so dates like 2026-01-31
+# or 01/15 and fractions like 2/3 of something don't match)
+_CALC_RE = re.compile(r'\(*[\d.]+\)*(?:(?:\s*[*+]\s*|\s+[-/]\s+)\(*[\d.]+\)*)+')
+_CALC_HINT_RE = re.compile(r'\b(servings?|convert\w*)\b', re.IGNORECASE)
+_WEB_RE = re.compile(r'\b(recipes?|substitut\w*|alternatives?|online)\b', re.IGNORECASE)
+_REPORT_RE = re.compile(r'\b(monthly|full\s+report|summary)\b', re.IGNORECASE)
+
+# Fixed parts of the final-answer prompt, built once at import
+_PROMPT_HEAD = get_anti_hallucination_instructions() + "\n\n"
+_PROMPT_TAIL_TOOL = "\n\nUsing the tool results above, answer the user's query accurately and concisely.\n"
+_PROMPT_TAIL_NOTOOL = "Answer the user's query based on your knowledge of the inventory system.\n"
+
+# Marks a tool call the agent rejected without running the tool
+# (e.g. missing parameters); process_query re-asks the LLM once
+_TOOL_ERROR_PREFIX = "ERROR:"
+
+# Generation options for the two kinds of LLM call.
+# Tool selection only needs a short, deterministic TOOL/PARAMETERS block,
+# so it gets a small token budget and stops as soon as the block is done.
+# The selection prompt is short, so a 2048-token context is plenty and
+# keeps the KV cache small. Answer prompts carry tool output (reports,
+# search hits) and keep the model's default context.
+_TOOL_SELECT_OPTS = {
+    "temperature": 0.0,
+    "num_predict": 64,
+    "num_ctx": 2048,
+    "stop": ["\n\n\n", "User Query:"]
+}
+_ANSWER_OPTS = {
+    "temperature": 0.7,
+    "num_predict": 500
+}
 
 
 class KitchenInventoryAgent:
@@ -25,56 +85,211 @@ class KitchenInventoryAgent:
         
         Args:
             vector_store: VectorStore instance for inventory access
+            
+        The model is a 4-bit (Q4_K_M) quantized build by default: about half
+        the memory traffic per token of larger formats, so it generates
+        faster on CPU. Set KITCHEN_AGENT_MODEL to use another tag
+        (e.g. a Q5_K_M build trades some speed for quality).
         """
         self.vector_store = vector_store
         self.tools = InventoryTools(vector_store)
+        
+        # Map tool names to (tool method, accepted parameter names).
+        # The LLM doesn't always use the documented parameter name,
+        # so common alternatives are accepted too (first one is canonical).
+        self._tool_map = {
+            "search_inventory": (self.tools.search_inventory, ("query", "item", "search_term", "search")),
+            "calculate": (self.tools.calculate, ("expression", "calculation", "query")),
+            "web_search": (self.tools.web_search, ("query", "search_term", "search")),
+            "generate_monthly_report": (self.tools.generate_monthly_report, ())
+        }
+        
+        # Tool names the LLM invented that don't exist
+        self._bad_tools = set()
         self.ollama_url = "http://localhost:11434/api/generate"
-        self.model = "qwen2.5:3b"
+        self.model = os.environ.get("KITCHEN_AGENT_MODEL", "qwen2.5:3b-instruct-q4_K_M")
+        
+        # Reuse keep-alive connections to Ollama instead of opening
+        # a new TCP connection for every LLM call
+        self._http = requests.Session()
+        self._http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        self._http.headers["Connection"] = "keep-alive"
+        self._system_prompt = get_system_prompt()
         
-        # Store conversation history for context
-        self.conversation_history = []
+        # Store conversation history for context (last 20 turns only,
+        # so long sessions don't grow memory without bound)
+        self.conversation_history = deque(maxlen=20)
+        
+        # Previous LLM answers: exact match on the normalized question
+        # first, then by embedding similarity
+        self._exact_cache = LRUCache(max_entries=1024)
+        self._sem_cache = SemanticCache(threshold=0.92)
+        
+        # Worker threads for running LLM calls concurrently (I/O bound)
+        self._pool = ThreadPoolExecutor(max_workers=3)
+        
+        # Async HTTP client for the *_async methods, created on first use
+        # because it is tied to the running event loop, and closed again
+        # once no async call is using it (see _async_client_scope)
+        self._aclient = None
+        self._aclient_loop = None
+        self._aclient_users = 0
+        self._batcher = BatchCollector(self._post_generate_async) if BATCH_MODE else None
     
-    def call_llm(self, prompt, system_prompt=None):
+    def _cache_lookup(self, prompt, system_prompt, cache_key, semantic=True):
         """
-        Call the Ollama LLM with a prompt.
+        Check the response caches before paying for a full LLM call.
+        
+        The normalized cache key is tried as an exact match first; only
+        on a miss is it embedded and compared semantically. Everything
+        outside the cache key (system prompt, instructions, tool results)
+        must match exactly, so it forms the namespace.
+        
+        With semantic=False only the exact cache is used. Tool-selection
+        responses need this: they carry query-specific parameters, so a
+        similar question about another item must not reuse them.
         
-        Args:
-            prompt: The main question/instruction for the LLM
-            system_prompt: Optional system-level instructions
-            
         Returns:
-            LLM's text response
+            Tuple of (cached response or None, cache entry) - pass the
+            entry to _cache_store once a fresh response is generated
         """
+        key_text = cache_key or prompt
+        namespace = hash((system_prompt, prompt.replace(key_text, "", 1)))
+        exact_key = (namespace, normalize_query(key_text))
+        
+        cached = self._exact_cache.get(exact_key)
+        if cached is not None or not semantic:
+            return cached, (exact_key, None)
+        
+        key_embedding = self.vector_store.get_embedding(key_text)
+        if key_embedding is not None:
+            cached = self._sem_cache.lookup(key_embedding, namespace)
+            if cached is not None:
+                # Next time this wording hits the exact cache directly
+                self._exact_cache.put(exact_key, cached)
+        
+        return cached, (exact_key, key_embedding)
+    
+    def _cache_store(self, entry, text):
+        """Remember a successful LLM response under the entry from _cache_lookup."""
+        exact_key, key_embedding = entry
+        self._exact_cache.put(exact_key, text)
+        
+        if key_embedding is not None:
+            namespace = exact_key[0]
+            self._sem_cache.add(key_embedding, text, namespace)
+    
+    def _build_payload(self, prompt, system_prompt, stream, options):
+        """Build the JSON body for an Ollama /api/generate request."""
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.7,
-                "num_predict": 500
-            }
+            "stream": stream,
+            "options": options or _ANSWER_OPTS
         }
         
         # Add system prompt if provided
         if system_prompt:
             payload["system"] = system_prompt
         
+        return payload
+    
+    @staticmethod
+    def _llm_error(error):
+        """Turn an exception raised while calling the LLM into a message."""
+        if isinstance(error, (requests.exceptions.Timeout, httpx.TimeoutException)):
+            return "Error: Request timed out. The model may be overloaded."
+        if isinstance(error, (requests.exceptions.RequestException, httpx.HTTPError)):
+            return f"Error calling LLM: {str(error)}\nMake sure Ollama is running."
+        return f"Unexpected error: {str(error)}"
+    
+    def call_llm(self, prompt, system_prompt=None, cache_key=None, options=None,
+                 semantic_cache=True):
+        """
+        Call the Ollama LLM with a prompt.
+        
+        Args:
+            prompt: The main question/instruction for the LLM
+            system_prompt: Optional system-level instructions
+            cache_key: Part of the prompt to match semantically against
+                previous calls (defaults to the whole prompt)
+            options: Ollama generation options (defaults to the
+                final-answer profile)
+            semantic_cache: Also reuse responses to similar (not just
+                identical) cache keys - disable for tool selection
+            
+        Returns:
+            LLM's text response
+        """
+        cached, cache_entry = self._cache_lookup(prompt, system_prompt, cache_key, semantic_cache)
+        if cached is not None:
+            return cached
+        
+        payload = self._build_payload(prompt, system_prompt, stream=False, options=options)
+        
         try:
-            response = requests.post(
-                self.ollama_url, 
+            response = self._http.post(
+                self.ollama_url,
                 json=payload,
                 timeout=60  # 60 second timeout
             )
             response.raise_for_status()
             result = response.json()
-            return result.get("response", "")
+            text = result.get("response", "")
+        except Exception as e:
+            return self._llm_error(e)
         
-        except requests.exceptions.Timeout:
-            return "Error: Request timed out. The model may be overloaded."
-        except requests.exceptions.RequestException as e:
-            return f"Error calling LLM: {str(e)}\nMake sure Ollama is running."
+        # Only successful answers are cached
+        if text:
+            self._cache_store(cache_entry, text)
+        
+        return text
+    
+    def call_llm_stream(self, prompt, system_prompt=None, cache_key=None, options=None,
+                        semantic_cache=True):
+        """
+        Call the Ollama LLM and yield the response as it is generated.
+        
+        Same arguments as call_llm. Ollama streams one JSON object per
+        line, each carrying the next piece of text in "response".
+        
+        Yields:
+            Chunks of the LLM's text response
+        """
+        cached, cache_entry = self._cache_lookup(prompt, system_prompt, cache_key, semantic_cache)
+        if cached is not None:
+            yield cached
+            return
+        
+        payload = self._build_payload(prompt, system_prompt, stream=True, options=options)
+        chunks = []
+        
+        try:
+            with self._http.post(
+                self.ollama_url,
+                json=payload,
+                stream=True,
+                timeout=60  # 60 second timeout (per read)
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    token = chunk.get("response", "")
+                    if token:
+                        chunks.append(token)
+                        yield token
+                    if chunk.get("done"):
+                        break
         except Exception as e:
-            return f"Unexpected error: {str(e)}"
+            yield self._llm_error(e)
+            return
+        
+        # Only successful answers are cached
+        text = "".join(chunks)
+        if text:
+            self._cache_store(cache_entry, text)
     
     def parse_tool_call(self, llm_response):
         """
@@ -86,17 +301,23 @@ class KitchenInventoryAgent:
         Returns:
             Dictionary with tool_name and parameters, or None
         """
-        # Look for TOOL: pattern
-        tool_match = re.search(r'TOOL:\s*(\w+)', llm_response, re.IGNORECASE)
-        params_match = re.search(r'PARAMETERS:\s*({.*?})', llm_response, re.DOTALL | re.IGNORECASE)
+        # Most direct answers contain no tool call at all - skip the regex.
+        # The prompts ask for "TOOL:" in capitals, so a plain find is enough.
+        start = llm_response.find("TOOL:")
+        if start < 0:
+            return None
         
-        if tool_match:
-            tool_name = tool_match.group(1).lower()
+        # Look for TOOL: pattern (and its PARAMETERS, in a single scan),
+        # starting where the marker was found
+        match = _TOOL_RE.search(llm_response, start)
+        
+        if match:
+            tool_name = match.group(1).lower()
             
             # Parse parameters if present
             params = {}
-            if params_match:
-                param_str = params_match.group(1)
+            param_str = match.group(2)
+            if param_str:
                 try:
                     # Try JSON parsing
                     params = json.loads(param_str)
@@ -108,6 +329,45 @@ class KitchenInventoryAgent:
         
         return None
     
+    def _fast_router(self, user_query):
+        """
+        Pick a tool from keywords alone, skipping the tool-selection LLM call.
+        
+        Only clear-cut queries are routed: exactly one of inventory /
+        report / calculation / web keywords matches. Anything ambiguous
+        (e.g. an inventory question that also contains numbers) is left
+        to the LLM. Inventory keywords in a report request don't count,
+        since the report covers the whole inventory anyway.
+        
+        Args:
+            user_query: User's question/request
+            
+        Returns:
+            Dictionary with tool and parameters (like parse_tool_call), or None
+        """
+        candidates = []
+        
+        if _REPORT_RE.search(user_query):
+            candidates.append({"tool": "generate_monthly_report", "parameters": {}})
+        
+        expression = _CALC_RE.search(user_query)
+        if expression:
+            candidates.append({"tool": "calculate", "parameters": {"expression": expression.group(0)}})
+        elif _CALC_HINT_RE.search(user_query):
+            # Needs math, but the LLM has to work out the expression
+            return None
+        
+        if _WEB_RE.search(user_query):
+            candidates.append({"tool": "web_search", "parameters": {"query": user_query}})
+        
+        if _INV_RE.search(user_query) and not _REPORT_RE.search(user_query):
+            candidates.append({"tool": "search_inventory", "parameters": {"query": user_query}})
+        
+        if len(candidates) == 1:
+            return candidates[0]
+        
+        return None
+    
     def execute_tool(self, tool_name, parameters):
         """
         Execute a tool and return its result.
@@ -119,115 +379,200 @@ class KitchenInventoryAgent:
         Returns:
             Tool execution result as string
         """
-        # Map tool names to actual tool methods
-        tool_map = {
-            "search_inventory": self.tools.search_inventory,
-            "calculate": self.tools.calculate,
-            "web_search": self.tools.web_search,
-            "generate_monthly_report": self.tools.generate_monthly_report
-        }
+        tool = self._tool_map.get(tool_name)
+        
+        if tool is None:
+            # Remember it, so the LLM can be told not to use it again
+            self._bad_tools.add(tool_name)
+            return f"Unknown tool: {tool_name}. Available tools: {', '.join(self._tool_map.keys())}"
         
-        if tool_name not in tool_map:
-            return f"Unknown tool: {tool_name}. Available tools: {', '.join(tool_map.keys())}"
+        tool_func, param_names = tool
         
         try:
-            tool_func = tool_map[tool_name]
-            
-            # Different tools expect different parameters
-            if tool_name == "generate_monthly_report":
+            # Tools without parameters
+            if not param_names:
                 return tool_func()
             
-            elif tool_name == "search_inventory":
-                # Extract query from various possible parameter names
-                query = (
-                    parameters.get("query") or 
-                    parameters.get("item") or 
-                    parameters.get("search_term") or 
-                    parameters.get("search") or
-                    ""
-                )
-                return tool_func(query)
-            
-            elif tool_name == "calculate":
-                # Extract expression from various possible parameter names
-                expression = (
-                    parameters.get("expression") or 
-                    parameters.get("calculation") or 
-                    parameters.get("query") or
-                    ""
-                )
-                return tool_func(expression)
-            
-            elif tool_name == "web_search":
-                # Extract query from various possible parameter names
-                query = (
-                    parameters.get("query") or 
-                    parameters.get("search_term") or 
-                    parameters.get("search") or
-                    ""
-                )
-                return tool_func(query)
+            # Use the first non-empty value among the accepted parameter names
+            value = next((parameters[name] for name in param_names if parameters.get(name)), "")
+            if not str(value).strip():
+                return f"{_TOOL_ERROR_PREFIX} tool invocation missing '{param_names[0]}' parameter"
             
-            else:
-                return "Tool execution error: Unknown parameter format"
+            return tool_func(value)
         
         except Exception as e:
             return f"Error executing tool {tool_name}: {str(e)}"
     
-    def process_query(self, user_query):
+    def _tool_selection_prompt(self, user_query):
         """
-        Main processing function: handles the entire query → response flow.
+        Tool selection prompt, warning the LLM off tool names it made up before.
         
         Args:
             user_query: User's question/request
             
         Returns:
-            Final response string
+            Prompt that guides tool selection
         """
-        print(f"\n{'='*60}")
-        print(f"Processing query: {user_query}")
-        print(f"{'='*60}\n")
+        prompt = get_tool_selection_prompt(user_query)
+        if self._bad_tools:
+            prompt += f"\nDo not invoke these tools (they don't exist): {', '.join(sorted(self._bad_tools))}"
+        return prompt
+    
+    def _check_tool_call(self, tool_call):
+        """
+        Drop a tool call naming a tool already known not to exist.
         
-        # Step 1: Determine if we need tools
-        tool_descriptions = get_tool_descriptions()
-        tool_selection_prompt = get_tool_selection_prompt(user_query, tool_descriptions)
+        Running it would only produce the same "Unknown tool" error again,
+        so the query is answered directly instead.
         
-        # Ask LLM which tool(s) to use
-        system_prompt = get_system_prompt()
-        tool_decision = self.call_llm(tool_selection_prompt, system_prompt)
+        Args:
+            tool_call: Result of parse_tool_call (may be None)
+            
+        Returns:
+            The tool call, or None if it should be skipped
+        """
+        if tool_call and tool_call['tool'] in self._bad_tools:
+            logger.debug("[Skipping unknown tool: %s]", tool_call['tool'])
+            return None
+        return tool_call
+    
+    def _tool_retry_prompt(self, user_query, tool_error):
+        """
+        Tool selection prompt with a hint about the previous invalid call.
         
-        print(f"[Agent Decision]\n{tool_decision}\n")
+        Args:
+            user_query: User's question/request
+            tool_error: Error returned by execute_tool for the invalid call
+            
+        Returns:
+            Prompt asking the LLM to emit the tool call again
+        """
+        reason = tool_error[len(_TOOL_ERROR_PREFIX):].strip()
+        return (
+            self._tool_selection_prompt(user_query)
+            + f"\n\nPrevious tool call was invalid: {reason}. "
+            "Re-emit the tool call with a valid parameter."
+        )
+    
+    def _build_final_prompt(self, user_query, tool_result=""):
+        """
+        Build the prompt for the final answer.
         
-        # Step 2: Parse and execute tool if needed
+        Args:
+            user_query: User's question/request
+            tool_result: Output of the executed tool (empty if none)
+            
+        Returns:
+            Prompt string for the final LLM call
+        """
+        if tool_result:
+            return "".join((
+                "User Query: ", user_query, "\n\n", _PROMPT_HEAD,
+                "Tool Results:\n", tool_result, _PROMPT_TAIL_TOOL
+            ))
+        
+        return "".join((
+            "User Query: ", user_query, "\n\n", _PROMPT_HEAD, _PROMPT_TAIL_NOTOOL
+        ))
+    
+    def _run_tool_stage(self, user_query):
+        """
+        Steps 1-2 of query processing: pick a tool and execute it.
+        
+        Args:
+            user_query: User's question/request
+            
+        Returns:
+            Tuple of (tool result or "" if no tool was used,
+            future for the speculative direct answer or None)
+        """
+        logger.debug("Processing query: %s", user_query)
+        
+        # Step 1: Determine if we need tools.
+        # Obvious cases are routed by keywords, without asking the LLM.
+        tool_call = self._fast_router(user_query)
+        direct_future = None
+        
+        if tool_call:
+            logger.debug("[Fast Route] TOOL: %s", tool_call['tool'])
+        else:
+            tool_selection_prompt = self._tool_selection_prompt(user_query)
+            system_prompt = self._system_prompt
+            
+            # Ask LLM which tool(s) to use. At the same time, speculatively
+            # generate the direct (no tool) answer: if no tool is needed it is
+            # already on its way, otherwise it is simply discarded.
+            direct_prompt = self._build_final_prompt(user_query)
+            tool_future = self._pool.submit(
+                self.call_llm, tool_selection_prompt, system_prompt, user_query,
+                options=_TOOL_SELECT_OPTS, semantic_cache=False
+            )
+            direct_future = self._pool.submit(
+                self.call_llm, direct_prompt, system_prompt, user_query,
+                options=_ANSWER_OPTS
+            )
+            tool_decision = tool_future.result()
+            
+            logger.debug("[Agent Decision]\n%s", tool_decision)
+            tool_call = self._check_tool_call(self.parse_tool_call(tool_decision))
+        
+        # Step 2: Execute tool if needed
         tool_result = ""
-        tool_call = self.parse_tool_call(tool_decision)
         
         if tool_call:
-            print(f"[Executing Tool: {tool_call['tool']}]")
+            # Too late to abort an in-flight request, but its answer is unused
+            if direct_future:
+                direct_future.cancel()
+            logger.debug("[Executing Tool: %s]", tool_call['tool'])
             tool_result = self.execute_tool(tool_call['tool'], tool_call['parameters'])
-            print(f"[Tool Result]\n{tool_result[:200]}...\n")
+            
+            if tool_result.startswith(_TOOL_ERROR_PREFIX):
+                # Invalid tool call - ask the LLM once more with a hint
+                retry_decision = self.call_llm(
+                    self._tool_retry_prompt(user_query, tool_result),
+                    self._system_prompt, user_query, options=_TOOL_SELECT_OPTS,
+                    semantic_cache=False
+                )
+                logger.debug("[Agent Decision (retry)]\n%s", retry_decision)
+                retry_call = self._check_tool_call(self.parse_tool_call(retry_decision))
+                if retry_call:
+                    logger.debug("[Executing Tool: %s]", retry_call['tool'])
+                    tool_result = self.execute_tool(retry_call['tool'], retry_call['parameters'])
+            
+            if tool_result.startswith(_TOOL_ERROR_PREFIX):
+                # Still no usable tool call - answer without tools rather than
+                # passing the error to the LLM as if it were data. The
+                # speculative answer was cancelled, so generate it anew.
+                logger.debug("[Tool call failed - generating direct response]")
+                tool_result = ""
+                direct_future = None
+            
+            logger.debug("[Tool Result]\n%s...", tool_result[:200])
         else:
-            print("[No tool needed - generating direct response]\n")
+            logger.debug("[No tool needed - generating direct response]")
         
-        # Step 3: Build final prompt with all context
-        final_prompt = f"""User Query: {user_query}
-
-{get_anti_hallucination_instructions()}
-
-"""
+        return tool_result, direct_future
+    
+    def process_query(self, user_query):
+        """
+        Main processing function: handles the entire query → response flow.
         
-        if tool_result:
-            final_prompt += f"""Tool Results:
-{tool_result}
-
-Using the tool results above, answer the user's query accurately and concisely.
-"""
-        else:
-            final_prompt += """Answer the user's query based on your knowledge of the inventory system.
-"""
+        Args:
+            user_query: User's question/request
+            
+        Returns:
+            Final response string
+        """
+        tool_result, direct_future = self._run_tool_stage(user_query)
         
-        # Step 4: Generate final response
-        final_response = self.call_llm(final_prompt, system_prompt)
+        # Steps 3-4: Build final prompt with all context and generate response
+        if tool_result or direct_future is None:
+            final_prompt = self._build_final_prompt(user_query, tool_result)
+            final_response = self.call_llm(
+                final_prompt, self._system_prompt, cache_key=user_query, options=_ANSWER_OPTS
+            )
+        else:
+            final_response = direct_future.result()
         
         # Step 5: Store in conversation history
         self.conversation_history.append({
@@ -237,6 +582,43 @@ Using the tool results above, answer the user's query accurately and concisely.
         
         return final_response
     
+    def process_query_stream(self, user_query):
+        """
+        Like process_query, but streams the final response.
+        
+        Tool selection and execution run before this returns, so any
+        tool output is printed before the answer starts.
+        
+        Args:
+            user_query: User's question/request
+            
+        Returns:
+            Iterator over chunks of the final response
+        """
+        tool_result, direct_future = self._run_tool_stage(user_query)
+        return self._stream_final_response(user_query, tool_result, direct_future)
+    
+    def _stream_final_response(self, user_query, tool_result, direct_future):
+        """Steps 3-5 of process_query, yielding the answer as it arrives."""
+        if tool_result or direct_future is None:
+            final_prompt = self._build_final_prompt(user_query, tool_result)
+            chunks = []
+            for token in self.call_llm_stream(
+                final_prompt, self._system_prompt, cache_key=user_query, options=_ANSWER_OPTS
+            ):
+                chunks.append(token)
+                yield token
+            final_response = "".join(chunks)
+        else:
+            # The speculative direct answer was generated without streaming
+            final_response = direct_future.result()
+            yield final_response
+        
+        self.conversation_history.append({
+            "user": user_query,
+            "agent": final_response
+        })
+    
     def chat(self, user_input):
         """
         Simple chat interface wrapper.
@@ -247,4 +629,193 @@ Using the tool results above, answer the user's query accurately and concisely.
         Returns:
             Agent's response
         """
-        return self.process_query(user_input)
\ No newline at end of file
+        return self.process_query(user_input)
+    
+    def chat_stream(self, user_input):
+        """
+        Streaming chat interface wrapper.
+        
+        Args:
+            user_input: User's message
+            
+        Returns:
+            Iterator over chunks of the agent's response
+        """
+        return self.process_query_stream(user_input)
+    
+    # ------------------------------------------------------------------
+    # Async API
+    #
+    # Same flow as process_query, but I/O runs on an event loop so a
+    # server can handle several users' turns concurrently. Tools and
+    # embeddings are synchronous, so they run in worker threads.
+    # ------------------------------------------------------------------
+    
+    def _get_async_client(self):
+        """Return the shared async HTTP client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient = httpx.AsyncClient(
+                timeout=60.0,
+                limits=httpx.Limits(max_keepalive_connections=16)
+            )
+            self._aclient_loop = loop
+        return self._aclient
+    
+    @contextlib.asynccontextmanager
+    async def _async_client_scope(self):
+        """
+        Keep the async HTTP client open while async calls are running.
+        
+        The client is closed when the last call finishes, so it never
+        outlives its event loop. With asyncio.run(agent.chat_async(q))
+        once per turn, every turn opens and closes its own client instead
+        of leaving the previous one (and its connections) behind.
+        """
+        self._aclient_users += 1
+        try:
+            yield
+        finally:
+            self._aclient_users -= 1
+            if self._aclient_users == 0:
+                await self.aclose()
+    
+    async def _post_generate_async(self, payload):
+        """Send one /api/generate request and return the decoded JSON."""
+        response = await self._get_async_client().post(self.ollama_url, json=payload)
+        response.raise_for_status()
+        return response.json()
+    
+    async def call_llm_async(self, prompt, system_prompt=None, cache_key=None, options=None,
+                             semantic_cache=True):
+        """
+        Async version of call_llm (same arguments and return value).
+        """
+        cached, cache_entry = await asyncio.to_thread(
+            self._cache_lookup, prompt, system_prompt, cache_key, semantic_cache
+        )
+        if cached is not None:
+            return cached
+        
+        payload = self._build_payload(prompt, system_prompt, stream=False, options=options)
+        
+        try:
+            async with self._async_client_scope():
+                if self._batcher:
+                    result = await self._batcher.submit(payload)
+                else:
+                    result = await self._post_generate_async(payload)
+            text = result.get("response", "")
+        except Exception as e:
+            return self._llm_error(e)
+        
+        # Only successful answers are cached
+        if text:
+            self._cache_store(cache_entry, text)
+        
+        return text
+    
+    async def execute_tool_async(self, tool_name, parameters):
+        """
+        Async version of execute_tool; the tool runs in a worker thread.
+        """
+        return await asyncio.to_thread(self.execute_tool, tool_name, parameters)
+    
+    async def process_query_async(self, user_query):
+        """
+        Async version of process_query.
+        
+        Args:
+            user_query: User's question/request
+            
+        Returns:
+            Final response string
+        """
+        # One HTTP client (and its keep-alive connections) for the whole turn
+        async with self._async_client_scope():
+            return await self._process_query_async(user_query)
+    
+    async def _process_query_async(self, user_query):
+        """Body of process_query_async."""
+        system_prompt = self._system_prompt
+        
+        # Step 1: Determine if we need tools (keywords first, then the LLM,
+        # with the direct answer generated concurrently as in process_query)
+        tool_call = self._fast_router(user_query)
+        direct_task = None
+        
+        if not tool_call:
+            direct_task = asyncio.create_task(self.call_llm_async(
+                self._build_final_prompt(user_query), system_prompt, user_query,
+                options=_ANSWER_OPTS
+            ))
+            tool_decision = await self.call_llm_async(
+                self._tool_selection_prompt(user_query), system_prompt, user_query,
+                options=_TOOL_SELECT_OPTS, semantic_cache=False
+            )
+            tool_call = self._check_tool_call(self.parse_tool_call(tool_decision))
+        
+        # Step 2: Execute tool if needed
+        tool_result = ""
+        if tool_call:
+            if direct_task:
+                direct_task.cancel()
+            tool_result = await self.execute_tool_async(tool_call['tool'], tool_call['parameters'])
+            
+            if tool_result.startswith(_TOOL_ERROR_PREFIX):
+                # Invalid tool call - ask the LLM once more with a hint
+                retry_decision = await self.call_llm_async(
+                    self._tool_retry_prompt(user_query, tool_result),
+                    system_prompt, user_query, options=_TOOL_SELECT_OPTS,
+                    semantic_cache=False
+                )
+                retry_call = self._check_tool_call(self.parse_tool_call(retry_decision))
+                if retry_call:
+                    tool_result = await self.execute_tool_async(retry_call['tool'], retry_call['parameters'])
+            
+            if tool_result.startswith(_TOOL_ERROR_PREFIX):
+                # Still no usable tool call - answer without tools
+                # (the direct task was cancelled, so generate it anew)
+                tool_result = ""
+                direct_task = None
+        
+        # Steps 3-4: Build final prompt and generate response
+        if tool_result or direct_task is None:
+            final_prompt = self._build_final_prompt(user_query, tool_result)
+            final_response = await self.call_llm_async(
+                final_prompt, system_prompt, cache_key=user_query, options=_ANSWER_OPTS
+            )
+        else:
+            final_response = await direct_task
+        
+        # Step 5: Store in conversation history
+        self.conversation_history.append({
+            "user": user_query,
+            "agent": final_response
+        })
+        
+        return final_response
+    
+    async def chat_async(self, user_input):
+        """
+        Async chat interface wrapper.
+        
+        Args:
+            user_input: User's message
+            
+        Returns:
+            Agent's response
+        """
+        return await self.process_query_async(user_input)
+    
+    async def aclose(self):
+        """
+        Close the async HTTP client now.
+        
+        Async calls already close it when the last one finishes; this is
+        for shutting down while calls are still in flight.
+        """
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+            self._aclient_loop = None
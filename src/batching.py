@@ -0,0 +1,96 @@
+"""
+Request Batching for Kitchen Inventory Agent
+
+When the agent serves several users at once (through the async API),
+their LLM requests can be grouped and sent together. A backend with
+continuous batching (e.g. vLLM) then processes them in one pass,
+instead of one request at a time.
+
+Ollama does not batch requests itself, so batching mainly pays off
+with such a backend. Enable it with KITCHEN_AGENT_BATCH_MODE=1.
+"""
+
+import asyncio
+
+
+class BatchCollector:
+    """
+    Collects requests for a short time and sends them as one batch.
+    
+    Key Concepts:
+    - Batch: Requests that arrived close together, sent concurrently
+    - max_batch: A full batch is sent immediately
+    - max_wait: Otherwise a batch is sent this long after its first request
+    
+    Each caller awaits submit() and gets back the result of its own request.
+    """
+    
+    def __init__(self, send, max_batch=8, max_wait=0.025):
+        """
+        Initialize the collector.
+        
+        Args:
+            send: Async function that performs one request and returns its result
+            max_batch: Maximum number of requests per batch
+            max_wait: Seconds to wait for more requests before sending
+        """
+        self._send = send
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        
+        self._pending = []       # (request, future) pairs for the next batch
+        self._timer = None       # Task that sends the batch after max_wait
+        self._tasks = set()      # Keep references to running batch tasks
+    
+    async def submit(self, request):
+        """
+        Add a request to the current batch and wait for its result.
+        
+        Args:
+            request: Request data passed to the send function
+        
+        Returns:
+            Result of the send function for this request
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((request, future))
+        
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        
+        return await future
+    
+    async def _flush_later(self):
+        """Send the current batch once max_wait has passed."""
+        await asyncio.sleep(self.max_wait)
+        self._timer = None
+        self._flush()
+    
+    def _flush(self):
+        """Start sending all pending requests."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._send_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _send_batch(self, batch):
+        """Send a batch concurrently and hand each result to its caller."""
+        results = await asyncio.gather(
+            *(self._send(request) for request, _ in batch),
+            return_exceptions=True
+        )
+        
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue  # Caller gave up (cancelled)
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
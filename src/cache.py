@@ -0,0 +1,323 @@
+"""
+Response Caches for Kitchen Inventory Agent
+
+Calling the LLM is by far the slowest thing the agent does.
+These caches let us skip that call when we've already answered
+the same (or a very similar) question.
+
+Sections:
+1. Query Normalization - Makes trivially different questions identical
+2. Exact Cache - Finds previous answers for the same normalized question
+3. Semantic Cache - Finds previous answers by meaning (embedding similarity)
+4. Embedding Cache - Remembers embeddings so the same text is embedded once
+"""
+
+import os
+import re
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+# Punctuation to drop: anything that isn't a word character, whitespace
+# or part of a math expression, plus dots that aren't decimal points
+_PUNCT_RE = re.compile(r"[^\w\s.+\-*/()]|\.(?!\d)")
+
+# Unit spellings mapped to their short form
+_UNIT_SYNONYMS = {
+    "litre": "l", "litres": "l", "liter": "l", "liters": "l",
+    "millilitre": "ml", "millilitres": "ml", "milliliter": "ml", "milliliters": "ml",
+    "kilogram": "kg", "kilograms": "kg", "kilo": "kg", "kilos": "kg",
+    "gram": "g", "grams": "g",
+}
+
+
+def normalize_query(text):
+    """
+    Reduce a question to a canonical form for exact-match caching.
+    
+    Lowercases, drops punctuation, collapses whitespace and unifies
+    unit names, so "Olive Oil?" and "olive oil" become the same key.
+    Numbers and math operators are kept intact.
+    
+    Args:
+        text: Question text
+        
+    Returns:
+        Normalized string
+    """
+    words = _PUNCT_RE.sub("", text.lower()).split()
+    return " ".join(_UNIT_SYNONYMS.get(word, word) for word in words)
+
+
+class LRUCache:
+    """
+    Small dictionary that forgets its least recently used entries.
+    
+    Used as the cheap first tier in front of SemanticCache: a hit here
+    needs no embedding call at all.
+    """
+    
+    def __init__(self, max_entries=1024):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            max_entries: Least recently used entries are evicted beyond this size
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Return the value stored for key (None on a miss)."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SemanticCache:
+    """
+    Stores responses keyed by embedding vectors.
+    
+    Key Concepts:
+    - Entry: An embedding (the question's meaning) plus the stored response
+    - Namespace: Entries only match lookups from the same namespace
+      (e.g. tool selection answers never leak into final answers)
+    - Threshold: Minimum cosine similarity that counts as "same question"
+    
+    All embeddings live in one float32 matrix, so a lookup is a single
+    matrix-vector product instead of a Python loop over entries.
+    """
+    
+    def __init__(self, threshold=0.92, max_entries=256):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            threshold: Cosine similarity needed for a cache hit (0-1)
+            max_entries: Oldest entries are evicted beyond this size
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        
+        # Rows are L2-normalized, so cosine similarity is a plain dot product
+        self._matrix = None
+        self._namespaces = np.empty(0, dtype=np.int64)
+        self._values = []
+        
+        # The agent may call the LLM from several threads at once
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _unit(embedding):
+        """Convert an embedding to a float32 unit vector (None if empty)."""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm == 0:
+            return None
+        return vec / norm
+    
+    def lookup(self, embedding, namespace=0):
+        """
+        Find a stored response for a similar embedding.
+        
+        Args:
+            embedding: Vector for the incoming question
+            namespace: Integer key the entry must have been stored under
+        
+        Returns:
+            Stored response, or None on a miss
+        """
+        query = self._unit(embedding)
+        if query is None:
+            return None
+        
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != query.shape[0]:
+                return None
+            
+            scores = np.dot(self._matrix, query)
+            scores[self._namespaces != namespace] = -1.0
+            best = int(np.argmax(scores))
+            
+            if scores[best] >= self.threshold:
+                return self._values[best]
+        
+        return None
+    
+    def add(self, embedding, value, namespace=0):
+        """
+        Store a response for an embedding.
+        
+        Args:
+            embedding: Vector for the question that was answered
+            value: Response to return on future hits
+            namespace: Integer key to store the entry under
+        """
+        row = self._unit(embedding)
+        if row is None:
+            return
+        
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != row.shape[0]:
+                # First entry (or the embedding model changed) - start fresh
+                self._matrix = row[None, :]
+                self._namespaces = np.array([namespace], dtype=np.int64)
+                self._values = [value]
+                return
+            
+            self._matrix = np.vstack([self._matrix, row])
+            self._namespaces = np.append(self._namespaces, np.int64(namespace))
+            self._values.append(value)
+            
+            # Evict oldest entries (FIFO)
+            overflow = len(self._values) - self.max_entries
+            if overflow > 0:
+                self._matrix = self._matrix[overflow:]
+                self._namespaces = self._namespaces[overflow:]
+                self._values = self._values[overflow:]
+    
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._matrix = None
+            self._namespaces = np.empty(0, dtype=np.int64)
+            self._values = []
+
+
+class EmbeddingCache:
+    """
+    Remembers the embedding of every text that was already embedded.
+    
+    Key Concepts:
+    - Key: SHA-256 of the embedding model name and the text, so switching
+      models never returns vectors from the old one
+    - Memory tier: LRUCache of recent embeddings (no disk access at all)
+    - Disk tier: Optional SQLite table that survives restarts, trimmed to
+      the most recently written max_disk_entries rows (by rowid)
+    
+    Embeddings are stored as raw float32 bytes.
+    """
+    
+    def __init__(self, path=None, max_entries=1024, max_disk_entries=10000):
+        """
+        Initialize the cache.
+        
+        Args:
+            path: SQLite file for the disk tier (None = memory only)
+            max_entries: Size of the in-memory tier
+            max_disk_entries: Oldest rows are deleted beyond this size
+        """
+        self._memory = LRUCache(max_entries)
+        self.max_disk_entries = max_disk_entries
+        self._db = None
+        
+        # One connection shared by all threads, serialized by the lock
+        self._lock = threading.Lock()
+        
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(sha256 TEXT PRIMARY KEY, model TEXT, embedding BLOB)"
+            )
+            self._db.commit()
+    
+    @staticmethod
+    def key(model, text):
+        """Cache key for a text embedded with the given model."""
+        return hashlib.sha256((model + "\0" + text).encode("utf-8")).hexdigest()
+    
+    def get(self, model, text):
+        """
+        Look up a stored embedding.
+        
+        Args:
+            model: Name of the embedding model
+            text: Text that was embedded
+            
+        Returns:
+            float32 array, or None on a miss
+        """
+        key = self.key(model, text)
+        embedding = self._memory.get(key)
+        if embedding is not None or self._db is None:
+            return embedding
+        
+        with self._lock:
+            row = self._db.execute(
+                "SELECT embedding FROM embeddings WHERE sha256 = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        
+        embedding = np.frombuffer(row[0], dtype=np.float32)
+        self._memory.put(key, embedding)
+        return embedding
+    
+    def put(self, model, text, embedding):
+        """
+        Store an embedding.
+        
+        Args:
+            model: Name of the embedding model
+            text: Text that was embedded
+            embedding: Vector for the text
+        """
+        self.put_many(model, [text], [embedding])
+    
+    def put_many(self, model, texts, embeddings):
+        """
+        Store several embeddings in one disk transaction.
+        
+        Args:
+            model: Name of the embedding model
+            texts: Texts that were embedded
+            embeddings: One vector per text, in the same order
+        """
+        rows = []
+        for text, embedding in zip(texts, embeddings):
+            key = self.key(model, text)
+            embedding = np.asarray(embedding, dtype=np.float32)
+            self._memory.put(key, embedding)
+            rows.append((key, model, embedding.tobytes()))
+        
+        if self._db is not None and rows:
+            with self._lock:
+                # REPLACE gives the row a new rowid, so rowid order = write order
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows
+                )
+                self._db.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+                self._db.commit()
+    
+    def clear(self):
+        """Remove all entries (memory and disk)."""
+        self._memory.clear()
+        if self._db is not None:
+            with self._lock:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
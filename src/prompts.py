@@ -8,9 +8,14 @@ Sections:
 1. System Prompt - Defines agent's role and behavior
 2. Tool Selection Prompt - Helps agent decide which tool to use
 3. Response Format - Structures the final answer
+
+The constant prompts are cached, since they are requested on every turn.
 """
 
+from functools import lru_cache
+
 
+@lru_cache(maxsize=1)
 def get_system_prompt():
     """System prompt defines the agent's core identity and behavior."""
     return """You are an AI assistant for a restaurant kitchen inventory management system.
@@ -108,7 +113,7 @@ PARAMETERS: {"param": "value"}
 Wait for the tool result before continuing your response."""
 
 
-def get_tool_selection_prompt(user_query, tool_descriptions):
+def get_tool_selection_prompt(user_query, tool_descriptions=None):
     """
     Help the agent decide which tool(s) to use for a given query.
     
@@ -117,14 +122,15 @@ def get_tool_selection_prompt(user_query, tool_descriptions):
     Args:
         user_query: What the user is asking
         tool_descriptions: Dictionary of available tools
+            (defaults to the precomputed list of all tools)
         
     Returns:
         Prompt that guides tool selection
     """
-    tools_text = "\n".join([
-        f"- {name}: {info['description']}"
-        for name, info in tool_descriptions.items()
-    ])
+    if tool_descriptions is None:
+        tools_text = _TOOLS_TEXT
+    else:
+        tools_text = _format_tools(tool_descriptions)
     
     return f"""Given this user query: "{user_query}"
 
@@ -147,6 +153,14 @@ TOOL: tool_name
 PARAMETERS: {{"param": "value"}}"""
 
 
+def _format_tools(tool_descriptions):
+    """Format tool descriptions as a bulleted list."""
+    return "\n".join([
+        f"- {name}: {info['description']}"
+        for name, info in tool_descriptions.items()
+    ])
+
+
 def format_context(retrieved_docs):
     """
     Format retrieved documents for injection into the prompt.
@@ -173,6 +187,7 @@ def format_context(retrieved_docs):
     return context
 
 
+@lru_cache(maxsize=1)
 def get_response_template():
     """
     Template for how the agent should structure its final response.
@@ -191,6 +206,7 @@ Keep responses concise but complete. Use professional but friendly language."""
 
 
 # Example of preventing hallucination
+@lru_cache(maxsize=1)
 def get_anti_hallucination_instructions():
     """
     Instructions to prevent the AI from making up information.
@@ -225,12 +241,14 @@ def get_anti_hallucination_instructions():
 
 ALWAYS use tools rather than guessing. It's better to say "I don't know" than to provide incorrect information."""
 
+@lru_cache(maxsize=1)
 def get_tool_descriptions():
     """
     Return descriptions of all available tools.
     
     Returns:
         Dictionary mapping tool names to their descriptions
+        (cached and shared between callers - do not modify)
     """
     return {
         "search_inventory": {
@@ -249,4 +267,8 @@ def get_tool_descriptions():
             "description": "Generate a complete inventory report showing all items, quantities, and details. Use this when user asks for a full inventory report or summary.",
             "parameters": "none - this tool takes no parameters"
         }
-    }
\ No newline at end of file
+    }
+
+
+# Tool list used by get_tool_selection_prompt, built once at import
+_TOOLS_TEXT = _format_tools(get_tool_descriptions())
@@ -6,7 +6,67 @@ The agent decides when to use each tool based on the user's question.
 """
 
 import re
+import ast
+import logging
 import requests
+from functools import lru_cache
+from types import MappingProxyType
+from src.cache import LRUCache
+from src.vector_store import EmbeddingUnavailableError
+
+
+logger = logging.getLogger(__name__)
+
+
+# Syntax allowed in calculator expressions: numbers and arithmetic only.
+# (ast.Num is not used - it was removed in Python 3.14.)
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.USub, ast.UAdd
+)
+
+
+# Simulated web search responses for common queries (read-only, built once)
+# In production, web_search would call a real search API
+_SIMULATED_RESPONSES = MappingProxyType({
+    "olive oil": "Common olive oil substitutes:\n- Canola oil (neutral flavor, good for high heat)\n- Avocado oil (similar health benefits, high smoke point)\n- Grapeseed oil (light flavor, versatile)\n- Sunflower oil (economical alternative)",
+    
+    "flour": "Types of flour and uses:\n- All-purpose: General baking and cooking\n- Bread flour: High protein, best for yeast breads\n- Cake flour: Low protein, tender baked goods\n- Whole wheat: Higher fiber, denser texture",
+    
+    "suppliers": "Finding reliable food suppliers:\n1. Check local wholesaler directories\n2. Join restaurant industry associations\n3. Attend food trade shows\n4. Get recommendations from other restaurants\n5. Compare pricing and delivery terms",
+})
+
+# Monthly report layout
+_HEADER = "=" * 50 + "\nMONTHLY INVENTORY REPORT\nDate: January 31, 2026\n" + "=" * 50
+_SEP = "-" * 50
+
+
+@lru_cache(maxsize=512)
+def _compile_expression(expression):
+    """
+    Parse a math expression and compile it, rejecting anything but arithmetic.
+    
+    Compiled code is cached per expression string, so repeated
+    calculations skip parsing entirely.
+    
+    Args:
+        expression: Math expression as string (e.g., "3.5 * 1000 / 15")
+        
+    Returns:
+        Compiled code object, ready for eval()
+        
+    Raises:
+        ValueError: If the expression contains anything but numbers and operators
+    """
+    tree = ast.parse(expression, mode="eval")
+    
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"unsupported syntax: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ValueError(f"unsupported value: {node.value!r}")
+    
+    return compile(tree, "<calc>", "eval")
 
 
 class InventoryTools:
@@ -19,6 +79,15 @@ class InventoryTools:
     3. Web Search - Search internet for external information (simulated)
     """
     
+    # Characters that are not part of a math expression (compiled once)
+    _EXPR_RE = re.compile(r'[^0-9+\-*/().\s]')
+    
+    # Any simulated topic, found anywhere in the query (compiled once)
+    _WEB_RE = re.compile("(" + "|".join(map(re.escape, _SIMULATED_RESPONSES)) + ")")
+    
+    # When several topics match, the one listed first wins
+    _WEB_PRIORITY = {topic: i for i, topic in enumerate(_SIMULATED_RESPONSES)}
+    
     def __init__(self, vector_store):
         """
         Initialize tools with access to vector store.
@@ -27,6 +96,10 @@ class InventoryTools:
             vector_store: VectorStore instance for inventory searches
         """
         self.vector_store = vector_store
+        
+        # Last successful search result per query, served (marked stale)
+        # while the embedding service is unavailable
+        self._last_results = LRUCache(max_entries=256)
     
     def search_inventory(self, query):
         """
@@ -43,14 +116,41 @@ class InventoryTools:
         Examples:
         - "How much olive oil do we have?" → searches for "olive oil"
         - "Where is the flour stored?" → searches for "flour"
+        
+        Queries of up to 3 words found as whole words in at most 2
+        documents skip the vector search.
         """
-        print(f"[TOOL CALL: search_inventory] Query: {query}")
+        logger.debug("[TOOL CALL: search_inventory] Query: %s", query)
+        
+        n_results = 2
+        
+        # Short item names (e.g. "flour") usually appear verbatim in the
+        # documents - find them as whole words, without embedding. Words
+        # found in more documents than we return (e.g. "price") need the
+        # ranking of the vector search instead.
+        needle = query.strip()
+        if needle and len(needle.split()) <= 3:
+            pattern = re.compile(r'\b' + re.escape(needle) + r'\b', re.IGNORECASE)
+            matches = [doc for doc in self.vector_store.get_all_inventory() if pattern.search(doc)]
+            if 0 < len(matches) <= n_results:
+                result = "\n\n".join(matches)
+                self._last_results.put(query, result)
+                return result
         
-        results = self.vector_store.search(query, n_results=2)
+        try:
+            results = self.vector_store.search(query, n_results=n_results)
+        except EmbeddingUnavailableError as e:
+            logger.warning("Inventory search unavailable: %s", e)
+            last_result = self._last_results.get(query)
+            if last_result is not None:
+                return "(stale) " + last_result
+            return "Inventory search is unavailable right now. Please try again shortly."
         
         if results:
             # Combine search results
-            return "\n\n".join(results)
+            result = "\n\n".join(results)
+            self._last_results.put(query, result)
+            return result
         else:
             return "No inventory information found for that query."
     
@@ -70,20 +170,20 @@ class InventoryTools:
         - "How many 15ml servings in 3.5L?" → "3.5 * 1000 / 15"
         - "What's 25kg - 5kg?" → "25 - 5"
         
-        Security Note: Uses eval() which can be dangerous in production.
-        In real systems, use a safe math parser library instead.
+        Security Note: The expression is parsed first and only numbers and
+        + - * / // operators are allowed before it is evaluated, without
+        access to Python's builtins.
         """
-        print(f"[TOOL CALL: calculate] Expression: {expression}")
+        logger.debug("[TOOL CALL: calculate] Expression: %s", expression)
         
         try:
             # Clean the expression (remove any non-math characters)
             # Allow only numbers, operators, parentheses, and decimal points
-            safe_expr = re.sub(r'[^0-9+\-*/().\s]', '', expression)
+            safe_expr = self._EXPR_RE.sub('', expression)
             
-            # Evaluate the mathematical expression
-            # WARNING: eval() is unsafe for user input in production!
-            # Use a library like 'simpleeval' for real applications
-            result = eval(safe_expr)
+            # Evaluate the mathematical expression (validated, cached code)
+            # with no builtins reachable, as a second line of defence
+            result = eval(_compile_expression(safe_expr.strip()), {"__builtins__": {}}, {})
             
             return f"Result: {result}"
         
@@ -113,23 +213,13 @@ class InventoryTools:
         - SerpAPI
         - Or use the actual Ollama web search capability
         """
-        print(f"[TOOL CALL: web_search] Query: {query}")
+        logger.debug("[TOOL CALL: web_search] Query: %s", query)
         
-        # Simulated responses for common queries
-        # In production, this would call a real search API
-        simulated_responses = {
-            "olive oil": "Common olive oil substitutes:\n- Canola oil (neutral flavor, good for high heat)\n- Avocado oil (similar health benefits, high smoke point)\n- Grapeseed oil (light flavor, versatile)\n- Sunflower oil (economical alternative)",
-            
-            "flour": "Types of flour and uses:\n- All-purpose: General baking and cooking\n- Bread flour: High protein, best for yeast breads\n- Cake flour: Low protein, tender baked goods\n- Whole wheat: Higher fiber, denser texture",
-            
-            "suppliers": "Finding reliable food suppliers:\n1. Check local wholesaler directories\n2. Join restaurant industry associations\n3. Attend food trade shows\n4. Get recommendations from other restaurants\n5. Compare pricing and delivery terms",
-        }
-        
-        # Find best match
-        query_lower = query.lower()
-        for key, response in simulated_responses.items():
-            if key in query_lower:
-                return f"Web Search Results:\n{response}"
+        # Find all topics with one regex scan over the query
+        topics = self._WEB_RE.findall(query.lower())
+        if topics:
+            topic = min(topics, key=self._WEB_PRIORITY.__getitem__)
+            return f"Web Search Results:\n{_SIMULATED_RESPONSES[topic]}"
         
         # Default response
         return f"Web search for '{query}' would be performed here. In production, this would use a real search API."
@@ -143,7 +233,7 @@ class InventoryTools:
         Returns:
             Formatted inventory report with all items
         """
-        print(f"[TOOL CALL: generate_monthly_report]")
+        logger.debug("[TOOL CALL: generate_monthly_report]")
         
         # Get all inventory documents
         all_inventory = self.vector_store.get_all_inventory()
@@ -151,13 +241,7 @@ class InventoryTools:
         if not all_inventory:
             return "No inventory data available."
         
-        # Format as report
-        report = "=" * 50 + "\n"
-        report += "MONTHLY INVENTORY REPORT\n"
-        report += "Date: January 31, 2026\n"
-        report += "=" * 50 + "\n\n"
-        
-        for doc in all_inventory:
-            report += doc + "\n\n" + "-" * 50 + "\n\n"
-        
-        return report
\ No newline at end of file
+        # Format as report (joined once instead of growing a string)
+        parts = [_HEADER]
+        parts.extend(f"{doc}\n\n{_SEP}" for doc in all_inventory)
+        return "\n\n".join(parts) + "\n\n"
\ No newline at end of file
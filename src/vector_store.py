@@ -9,10 +9,118 @@ This module handles:
 """
 
 import os
+import re
 import chromadb
 from chromadb.config import Settings
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from src.cache import EmbeddingCache, SemanticCache
+
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional - the standard json module works too
+    def _json_dumps(obj):
+        return json.dumps(obj).encode("utf-8")
+    _json_loads = json.loads
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional - search() then uses NumPy/BLAS only
+    njit = None
+
+
+# Older Ollama versions only have the one-text-per-request /api/embeddings
+# endpoint. Set OLLAMA_LEGACY_API=1 to use it instead of /api/embed.
+USE_LEGACY_API = os.environ.get("OLLAMA_LEGACY_API", "").lower() in ("1", "true", "yes")
+
+# Maximum texts per /api/embed request, so a large knowledge base is
+# sent as a few big batches rather than one oversized request
+EMBED_BATCH_SIZE = 64
+
+# Blank lines separate paragraphs in knowledge-base files
+# (split after them, so every paragraph keeps its own separator)
+_PARAGRAPH_RE = re.compile(r'(?<=\n\n)(?!\n)')
+
+# Knowledge-base chunking (characters): maximum chunk length, and how
+# much of the previous chunk each new chunk repeats
+CHUNK_SIZE = 2000
+CHUNK_OVERLAP = 200
+
+# Knowledge bases up to this many chunks are searched in memory;
+# larger ones go through Chroma's HNSW index
+MATRIX_SEARCH_LIMIT = 2048
+
+# Shared embedding blocks start with (rows, dims) as two int64 values
+_SHM_HEADER = 16
+
+
+def _chunk_sort_key(chunk_id):
+    """Order chunk ids ("file.txt:3") by file name, then chunk number."""
+    file_name, _, index = chunk_id.rpartition(":")
+    if not index.isdigit():
+        return (chunk_id, 0)  # Collections created before chunking
+    return (file_name, int(index))
+
+
+def _normalize_rows(embeddings):
+    """Scale each row to unit length, so cosine similarity is a plain dot product."""
+    mat = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    return mat / np.maximum(norms, 1e-9)
+
+
+if njit is not None:
+    @njit("int64[::1](float32[:, ::1], float32[::1], int64)",
+          parallel=True, fastmath=True, cache=True)
+    def _cosine_topk(mat, query, k):
+        """
+        Indices of the k rows of mat most similar to query, best first.
+        
+        Rows are unit length, so ranking by dot product is ranking by
+        cosine similarity (the query's own length doesn't change the order).
+        
+        Compiled to native code by Numba: the similarity loop runs in
+        parallel over rows and is vectorized with SIMD instructions.
+        The signature is given up front so compilation happens at import
+        (and is cached on disk) rather than on the first search.
+        
+        Args:
+            mat: Normalized document embeddings, one row per document
+            query: Query embedding
+            k: Number of results (at most the number of rows)
+        """
+        n, dims = mat.shape
+        
+        scores = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            dot = 0.0
+            for j in range(dims):
+                dot += mat[i, j] * query[j]
+            scores[i] = dot
+        
+        # k is small, so repeatedly taking the best remaining row is cheap
+        top = np.empty(k, dtype=np.int64)
+        taken = np.zeros(n, dtype=np.bool_)
+        for t in range(k):
+            best = -1
+            for i in range(n):
+                if not taken[i] and (best < 0 or scores[i] > scores[best]):
+                    best = i
+            taken[best] = True
+            top[t] = best
+        return top
+else:
+    _cosine_topk = None
+
+
+class EmbeddingUnavailableError(Exception):
+    """Raised by search() when the query can't be embedded (e.g. Ollama is down)."""
 
 
 class VectorStore:
@@ -25,30 +133,73 @@ class VectorStore:
     - Similarity Search: Finding documents with similar meanings
     """
     
-    def __init__(self, persist_directory="./vector_db", collection_name="inventory"):
+    def __init__(self, persist_directory="./vector_db", collection_name="inventory",
+                 shared_memory_name=None):
         """
         Initialize the vector store.
         
         Args:
             persist_directory: Where to save the database on disk
             collection_name: Name of the collection (like a table name)
+            shared_memory_name: Optional name of a shared memory block for
+                the knowledge-base embeddings. The first process to load
+                the knowledge base creates it; other worker processes
+                attach to it instead of embedding everything again.
         """
-        # Create ChromaDB client that saves to disk
-        self.client = chromadb.Client(Settings(
-            persist_directory=persist_directory,
-            anonymized_telemetry=False  # Don't send usage data
-        ))
+        # Create ChromaDB client that saves to disk, so the knowledge
+        # base is only embedded once and reused after a restart
+        self.client = chromadb.PersistentClient(
+            path=persist_directory,
+            settings=Settings(anonymized_telemetry=False)  # Don't send usage data
+        )
         
         # Get or create collection
         # Collections store embeddings + metadata + original text
+        # The hnsw:* keys configure the approximate nearest-neighbour
+        # index, so queries stay fast as the knowledge base grows
+        # (they only take effect when the collection is first created)
         self.collection = self.client.get_or_create_collection(
             name=collection_name,
-            metadata={"description": "Restaurant kitchen inventory data"}
+            metadata={
+                "description": "Restaurant kitchen inventory data",
+                "hnsw:space": "ip",              # Rows are unit length: inner product = cosine
+                "hnsw:M": 16,                    # Graph links per node
+                "hnsw:construction_ef": 100,     # Build-time search width
+                "hnsw:search_ef": 32             # Query-time search width
+            }
         )
         
-        # Ollama API endpoint for embeddings
+        # Ollama API endpoints for embeddings (batch and legacy single-text)
+        self.ollama_embed_url = "http://localhost:11434/api/embed"
         self.ollama_url = "http://localhost:11434/api/embeddings"
         self.embedding_model = "mxbai-embed-large"
+        
+        # Reuse keep-alive connections to Ollama instead of opening
+        # a new TCP connection for every embedding request
+        self._http = requests.Session()
+        self._http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        self._http.headers["Connection"] = "keep-alive"
+        self._http.headers["Content-Type"] = "application/json"
+        
+        # Embeddings already computed (kept on disk next to the database)
+        self._embedding_cache = EmbeddingCache(
+            os.path.join(persist_directory, "embedding_cache.sqlite3")
+        )
+        
+        # Results of recent searches, found again by query similarity
+        # (namespace = n_results, so different result counts never mix)
+        self._search_cache = SemanticCache(threshold=0.97, max_entries=256)
+        
+        # Knowledge-base embeddings (one row per document), optionally
+        # backed by shared memory so worker processes can reuse them
+        self.shared_memory_name = shared_memory_name
+        self._shm = None
+        self._shm_owner = False
+        self._kb_mat = None
+        self._kb_docs = []
+        
+        # All documents in the collection (filled by get_all_inventory)
+        self._all_docs_cache = None
     
     def get_embedding(self, text):
         """
@@ -58,76 +209,410 @@ class VectorStore:
             text: String to convert (e.g., "olive oil inventory")
             
         Returns:
-            List of 1024 numbers representing the text's meaning
+            float32 array of 1024 numbers representing the text's
+            meaning (None on error)
             
         How it works:
         1. Send text to Ollama API
         2. Ollama runs mxbai-embed-large model
         3. Returns 1024-dimensional vector
+        
+        Repeated texts are answered from the embedding cache.
         """
+        embeddings = self.embed_batch([text])
+        if embeddings is None:
+            return None
+        return embeddings[0]
+    
+    def _get_embedding_legacy(self, text):
+        """Embed one text through the legacy /api/embeddings endpoint."""
         payload = {
             "model": self.embedding_model,
             "prompt": text
         }
         
         try:
-            response = requests.post(self.ollama_url, json=payload)
+            response = self._http.post(self.ollama_url, data=_json_dumps(payload), timeout=30)
             response.raise_for_status()
-            return response.json()["embedding"]
+            return _json_loads(response.content)["embedding"]
         except Exception as e:
             print(f"Error getting embedding: {e}")
             return None
     
+    def embed_batch(self, texts):
+        """
+        Convert many texts into vectors with a single Ollama request.
+        
+        Args:
+            texts: List of strings to convert
+            
+        Returns:
+            float32 array with one row per text, or None on error
+            
+        The /api/embed endpoint accepts a list of inputs, so N texts
+        cost one HTTP round-trip per EMBED_BATCH_SIZE texts instead of
+        one per text. Texts found in the embedding cache are not sent.
+        """
+        cached = [self._embedding_cache.get(self.embedding_model, text) for text in texts]
+        missing = [text for text, embedding in zip(texts, cached) if embedding is None]
+        
+        if missing:
+            fresh = self._embed_uncached(missing)
+            if fresh is None:
+                return None
+            self._embedding_cache.put_many(self.embedding_model, missing, fresh)
+            
+            # Fill the gaps in input order
+            fresh = iter(fresh)
+            cached = [next(fresh) if embedding is None else embedding for embedding in cached]
+        
+        return np.asarray(cached, dtype=np.float32)
+    
+    def _embed_uncached(self, texts):
+        """Embed texts through Ollama (float32 array, or None on error)."""
+        if USE_LEGACY_API:
+            # One request per text - keep several in flight so Ollama
+            # isn't idle while each response travels back
+            if len(texts) > 1:
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    embeddings = list(executor.map(self._get_embedding_legacy, texts))
+            else:
+                embeddings = [self._get_embedding_legacy(text) for text in texts]
+            if any(embedding is None for embedding in embeddings):
+                return None
+            return np.asarray(embeddings, dtype=np.float32)
+        
+        batches = []
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            payload = {
+                "model": self.embedding_model,
+                "input": texts[start:start + EMBED_BATCH_SIZE]
+            }
+            
+            try:
+                response = self._http.post(self.ollama_embed_url, data=_json_dumps(payload), timeout=30)
+                response.raise_for_status()
+                embeddings = _json_loads(response.content)["embeddings"]
+                batches.append(np.asarray(embeddings, dtype=np.float32))
+            except Exception as e:
+                print(f"Error getting embeddings: {e}")
+                return None
+        
+        return np.concatenate(batches)
+    
+    def clear_cache(self):
+        """Forget all cached embeddings (e.g. after changing the model)."""
+        self._embedding_cache.clear()
+    
     def load_knowledge_base(self, knowledge_base_dir="./knowledge_base"):
         """
         Load all .txt files from knowledge base and vectorize them.
         
         Process:
         1. Read each .txt file
-        2. Split into chunks (each file = 1 chunk for simplicity)
-        3. Generate embedding for each chunk
+        2. Split into chunks (small files stay 1 chunk, see _chunk)
+        3. Generate embeddings for all chunks in batch requests
         4. Store in ChromaDB with metadata
         
         Args:
             knowledge_base_dir: Path to folder with .txt files
         """
-        # Check if collection already has data
-        if self.collection.count() > 0:
-            print(f"Collection already contains {self.collection.count()} documents.")
+        # Check if collection already has data (count once - it's a query)
+        existing = self.collection.count()
+        if existing > 0:
+            print(f"Collection already contains {existing} documents.")
             print("Skipping loading. Delete vector_db folder to reload.")
+            
+            # Keep an in-memory copy for fast searches, in the same row
+            # order as a fresh load so processes sharing it agree on rows
+            stored = self.collection.get(include=["embeddings", "documents"])
+            order = sorted(range(len(stored["ids"])), key=lambda i: _chunk_sort_key(stored["ids"][i]))
+            documents = [stored["documents"][i] for i in order]
+            
+            embeddings = self._attach_shared_embeddings(len(documents))
+            if embeddings is None:
+                embeddings = _normalize_rows(stored["embeddings"])[order]
+                if self.shared_memory_name:
+                    embeddings = self._share_embeddings(embeddings)
+            self._set_kb_matrix(embeddings, documents)
             return
         
         print("Loading knowledge base...")
         
-        # List all .txt files
-        files = [f for f in os.listdir(knowledge_base_dir) if f.endswith('.txt')]
-        
-        for file_name in files:
-            file_path = os.path.join(knowledge_base_dir, file_name)
-            
-            # Read file content
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Generate embedding
-            embedding = self.get_embedding(content)
-            
-            if embedding:
-                # Add to ChromaDB
-                # - ids: Unique identifier for this document
-                # - embeddings: The vector representation
-                # - documents: Original text (stored for retrieval)
-                # - metadatas: Extra info (file source)
-                self.collection.add(
-                    ids=[file_name],
-                    embeddings=[embedding],
-                    documents=[content],
-                    metadatas=[{"source": file_name}]
-                )
+        # List all .txt files in one directory scan (sorted, so every
+        # process sees the same order); entries carry their full path
+        with os.scandir(knowledge_base_dir) as it:
+            entries = sorted(
+                (entry for entry in it if entry.name.endswith('.txt') and entry.is_file()),
+                key=lambda entry: entry.name
+            )
+        files = [entry.name for entry in entries]
+        
+        # Read file contents and split them into chunks
+        ids, contents, metadatas = [], [], []
+        for entry in entries:
+            file_name = entry.name
+            with open(entry.path, 'r', encoding='utf-8') as f:
+                chunks = self._chunk(f.read())
+            
+            for i, chunk in enumerate(chunks):
+                ids.append(f"{file_name}:{i}")
+                contents.append(chunk)
+                metadatas.append({"source": file_name, "chunk_idx": i})
+        
+        # Reuse embeddings another process already shared, or
+        # generate all embeddings in (at most EMBED_BATCH_SIZE-sized) batches
+        # and normalize them once (cosine similarity becomes a dot product)
+        embeddings = self._attach_shared_embeddings(len(contents))
+        if embeddings is None and contents:
+            embeddings = self.embed_batch(contents)
+            if embeddings is not None:
+                embeddings = _normalize_rows(embeddings)
+            if embeddings is not None and self.shared_memory_name:
+                embeddings = self._share_embeddings(embeddings)
+        
+        if embeddings is not None:
+            self._set_kb_matrix(embeddings, contents)
+            
+            # Add to ChromaDB
+            # - ids: Unique identifier for each chunk ("file.txt:0", ...)
+            # - embeddings: The vector representations
+            # - documents: Original text (stored for retrieval)
+            # - metadatas: Extra info (file source, chunk number)
+            self.collection.add(
+                ids=ids,
+                embeddings=embeddings,  # float32 matrix, no list of floats
+                documents=contents,
+                metadatas=metadatas
+            )
+            self.invalidate()
+            for file_name in files:
                 print(f"✓ Loaded {file_name}")
         
         print(f"Knowledge base loaded: {self.collection.count()} documents")
     
+    @staticmethod
+    def _chunk(text, size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+        """
+        Split a document into chunks of at most size characters.
+        
+        Paragraphs are packed greedily into a chunk until the next one
+        would not fit. Each new chunk starts with the last overlap
+        characters of the previous one, so facts on a chunk border are
+        still found (and _unchunk can put the document back together
+        exactly). Paragraphs too long for one chunk are cut into
+        consecutive pieces.
+        
+        Keeps every input within the embedding model's context window,
+        and lets a query match a focused part of a long file.
+        
+        Args:
+            text: Document text
+            size: Maximum chunk length in characters
+            overlap: Characters repeated from the end of the previous chunk
+            
+        Returns:
+            List of chunk strings (one chunk for short documents)
+        """
+        if not text.strip():
+            return []
+        
+        # Pieces leave room for the carried-over tail
+        limit = size - overlap
+        
+        pieces = []
+        for paragraph in _PARAGRAPH_RE.split(text):
+            for start in range(0, len(paragraph), limit):
+                pieces.append(paragraph[start:start + limit])
+        
+        chunks = []
+        current = ""
+        for piece in pieces:
+            if current and len(current) + len(piece) > size:
+                chunks.append(current)
+                current = current[-overlap:] if overlap else ""
+            
+            current += piece
+        
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    @staticmethod
+    def _unchunk(chunks, overlap=CHUNK_OVERLAP):
+        """
+        Join the chunks of one document back into its full text.
+        
+        Reverses _chunk: the start each chunk repeats from the previous
+        one is dropped. (Chunks that don't repeat it are joined with a
+        blank line.)
+        
+        Args:
+            chunks: Chunks of one document, in order
+            overlap: Overlap that was used when chunking
+            
+        Returns:
+            Document text
+        """
+        if not overlap:
+            return "".join(chunks)
+        if not chunks:
+            return ""
+        
+        parts = [chunks[0]]
+        for previous, chunk in zip(chunks, chunks[1:]):
+            tail = previous[-overlap:]
+            if chunk.startswith(tail):
+                parts.append(chunk[len(tail):])
+            else:
+                parts.append("\n\n" + chunk)
+        return "".join(parts)
+    
+    def _set_kb_matrix(self, embeddings, documents):
+        """
+        Keep the knowledge base in memory for search().
+        
+        Only done for up to MATRIX_SEARCH_LIMIT documents; beyond that,
+        Chroma's index beats scanning every row.
+        
+        Args:
+            embeddings: One unit-length embedding per document
+            documents: Document texts, in the same order
+        """
+        if len(documents) > MATRIX_SEARCH_LIMIT:
+            self._kb_mat = None
+            self._kb_docs = []
+        else:
+            # No copy if this is already a float32 C-contiguous (e.g. shared) array
+            self._kb_mat = np.ascontiguousarray(embeddings, dtype=np.float32)
+            self._kb_docs = list(documents)
+        
+        # Cached search results may point at the old documents
+        self._search_cache.clear()
+    
+    def _search_matrix(self, query_embedding, n_results):
+        """
+        Rank in-memory documents by cosine similarity to a query.
+        
+        All similarities come from a single matrix-vector product
+        (one BLAS call, or a compiled Numba kernel when available)
+        instead of comparing documents one by one in Python.
+        
+        Args:
+            query_embedding: Query vector
+            n_results: How many documents to return
+            
+        Returns:
+            List of the most similar documents, best first
+            
+        Raises:
+            ValueError: If the query and the stored embeddings differ in
+            size (e.g. the embedding model changed)
+        """
+        query = np.ascontiguousarray(query_embedding, dtype=np.float32)
+        
+        # The Numba kernel doesn't bounds-check, so catch this here
+        if query.shape != (self._kb_mat.shape[1],):
+            raise ValueError(
+                f"query embedding has shape {query.shape}, "
+                f"stored embeddings have {self._kb_mat.shape[1]} dimensions"
+            )
+        
+        k = min(n_results, len(self._kb_docs))
+        if k <= 0:
+            return []
+        
+        # Compiled kernel when Numba is installed
+        if _cosine_topk is not None:
+            top = _cosine_topk(self._kb_mat, query, k)
+            return [self._kb_docs[i] for i in top]
+        
+        # Rows are unit length, so the dot product ranks by cosine similarity
+        scores = self._kb_mat @ query
+        
+        # Pick the top k without sorting everything, then order them
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self._kb_docs[i] for i in top]
+    
+    def _share_embeddings(self, embeddings):
+        """
+        Copy embeddings into a new shared memory block.
+        
+        Args:
+            embeddings: float32 array with one row per document
+            
+        Returns:
+            Array view of the shared copy (or the input array if another
+            process created the block first)
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        try:
+            self._shm = shared_memory.SharedMemory(
+                create=True, size=_SHM_HEADER + embeddings.nbytes, name=self.shared_memory_name
+            )
+        except FileExistsError:
+            # Another process got there first - keep our private copy
+            return embeddings
+        self._shm_owner = True
+        
+        np.ndarray(2, dtype=np.int64, buffer=self._shm.buf)[:] = embeddings.shape
+        shared = np.ndarray(embeddings.shape, dtype=np.float32, buffer=self._shm.buf, offset=_SHM_HEADER)
+        shared[:] = embeddings
+        return shared
+    
+    def _attach_shared_embeddings(self, expected_rows):
+        """
+        Attach to embeddings shared by another process (zero-copy).
+        
+        Args:
+            expected_rows: Number of documents this process loaded
+            
+        Returns:
+            Array view of the shared embeddings, or None if there is no
+            usable block (not configured, not created yet, or a different
+            number of documents)
+        """
+        if not self.shared_memory_name:
+            return None
+        
+        try:
+            try:
+                # Python 3.13+: don't let this process unlink the block on exit
+                shm = shared_memory.SharedMemory(name=self.shared_memory_name, track=False)
+            except TypeError:
+                shm = shared_memory.SharedMemory(name=self.shared_memory_name)
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, "shared_memory")
+        except FileNotFoundError:
+            return None
+        
+        rows, dims = (int(n) for n in np.ndarray(2, dtype=np.int64, buffer=shm.buf))
+        if rows != expected_rows:
+            shm.close()
+            return None
+        
+        self._shm = shm
+        print(f"Using shared embeddings from '{self.shared_memory_name}'")
+        return np.ndarray((rows, dims), dtype=np.float32, buffer=shm.buf, offset=_SHM_HEADER)
+    
+    def close_shared(self):
+        """
+        Release the shared embedding block.
+        
+        The process that created the block also removes it, so call this
+        in the creating process only after the workers are done.
+        """
+        if self._shm is None:
+            return
+        
+        self._kb_mat = None  # Drop the view before closing its buffer
+        self._shm.close()
+        if self._shm_owner:
+            self._shm.unlink()
+        self._shm = None
+        self._shm_owner = False
+    
     def search(self, query, n_results=2):
         """
         Find the most relevant documents for a query.
@@ -139,6 +624,12 @@ class VectorStore:
         Returns:
             List of relevant text chunks
             
+        Raises:
+            EmbeddingUnavailableError: If Ollama couldn't embed the query
+            (and it isn't in the embedding cache)
+            ValueError: If the query embedding doesn't match the size of
+            the stored ones
+            
         How similarity search works:
         1. Convert query to embedding
         2. Compare query embedding to all stored embeddings
@@ -147,24 +638,43 @@ class VectorStore:
         Example:
         Query: "olive oil stock"
         → Finds oils_fats.txt because "olive oil" is in that document
+        
+        Results are cached: a query whose embedding is almost identical
+        (cosine similarity >= 0.97) to a recent one reuses its documents.
         """
         # Convert query to vector
         query_embedding = self.get_embedding(query)
         
-        if not query_embedding:
-            return []
+        if query_embedding is None:
+            # Fail fast - don't query Chroma without a vector
+            raise EmbeddingUnavailableError(f"could not embed query: {query!r}")
         
-        # Search for similar vectors
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results
-        )
+        # Unit length like the stored rows, so inner product = cosine similarity
+        query_embedding = _normalize_rows(query_embedding[None, :])[0]
         
-        # Extract the actual text documents
-        if results and results['documents']:
-            return results['documents'][0]  # Returns list of matching documents
+        # A nearly identical query was answered recently
+        cached = self._search_cache.lookup(query_embedding, namespace=n_results)
+        if cached is not None:
+            return list(cached)
+        
+        # Knowledge base is in memory - rank it directly
+        if self._kb_mat is not None:
+            documents = self._search_matrix(query_embedding, n_results)
+        else:
+            # Search for similar vectors
+            results = self.collection.query(
+                query_embeddings=query_embedding[None, :],
+                n_results=n_results
+            )
+            
+            # Extract the actual text documents
+            documents = []
+            if results and results['documents']:
+                documents = results['documents'][0]  # List of matching documents
         
-        return []
+        if documents:
+            self._search_cache.add(query_embedding, list(documents), namespace=n_results)
+        return documents
     
     def get_all_inventory(self):
         """
@@ -172,8 +682,44 @@ class VectorStore:
         Useful for generating complete reports.
         
         Returns:
-            List of all document contents
+            List of all document contents, one per knowledge-base file
+            with its chunks joined back together (cached and shared
+            between callers - do not modify)
         """
-        # Get all documents from collection
-        all_docs = self.collection.get()
-        return all_docs['documents'] if all_docs else []
\ No newline at end of file
+        if self._all_docs_cache is None:
+            # Get all chunks from collection (only after a change),
+            # grouped by source file in file-name and chunk order
+            stored = self.collection.get(include=["documents", "metadatas"])
+            order = sorted(range(len(stored["ids"])), key=lambda i: _chunk_sort_key(stored["ids"][i]))
+            
+            files = {}
+            for i in order:
+                source = (stored["metadatas"][i] or {}).get("source", stored["ids"][i])
+                files.setdefault(source, []).append(stored["documents"][i])
+            
+            self._all_docs_cache = [self._unchunk(chunks) for chunks in files.values()]
+        return self._all_docs_cache
+    
+    def invalidate(self):
+        """
+        Forget cached documents and search results.
+        
+        Call this after adding or changing documents in the collection.
+        The in-memory copy used by search() is rebuilt from the collection
+        so new documents show up in results.
+        """
+        self._all_docs_cache = None
+        
+        count = self.collection.count()
+        if count == 0 or count > MATRIX_SEARCH_LIMIT:
+            # Nothing to keep in memory - search() asks Chroma
+            self._kb_mat = None
+            self._kb_docs = []
+            self._search_cache.clear()
+            return
+        
+        # Same row order as load_knowledge_base()
+        stored = self.collection.get(include=["embeddings", "documents"])
+        order = sorted(range(len(stored["ids"])), key=lambda i: _chunk_sort_key(stored["ids"][i]))
+        documents = [stored["documents"][i] for i in order]
+        self._set_kb_matrix(_normalize_rows(stored["embeddings"])[order], documents)
\ No newline at end of file
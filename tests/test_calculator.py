@@ -0,0 +1,45 @@
+"""
+Tests for the calculator tool's expression checking.
+
+The allowlist in _compile_expression is what keeps LLM-chosen
+expressions from running arbitrary code, so it is tested directly.
+"""
+
+import pytest
+
+from src.tools import InventoryTools, _compile_expression
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os')",
+    "__import__('os').system('true')",
+    "2**100",
+    "(1).real",
+    "abs(-1)",
+    "'a' * 3",
+    "[1, 2]",
+    "x + 1",
+    "lambda: 1",
+])
+def test_rejects_non_arithmetic(expression):
+    with pytest.raises((ValueError, SyntaxError)):
+        _compile_expression(expression)
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("3.5 * 1000 / 15", 3.5 * 1000 / 15),
+    ("25 - 5", 20),
+    ("-(2 + 3) * 4", -20),
+    ("7 // 2", 3),
+])
+def test_accepts_arithmetic(expression, expected):
+    assert eval(_compile_expression(expression), {"__builtins__": {}}, {}) == expected
+
+
+def test_calculate_tool():
+    tools = InventoryTools(vector_store=None)
+    
+    assert tools.calculate("3.5 * 1000 / 15") == f"Result: {3.5 * 1000 / 15}"
+    assert tools.calculate("1 / 0").startswith("Error calculating:")
+    # Letters are stripped before parsing, so this can't reach __import__
+    assert tools.calculate("__import__('os')").startswith("Error calculating:")
@@ -0,0 +1,47 @@
+"""
+Tests for splitting documents into chunks and joining them back.
+
+get_all_inventory() rebuilds whole files with _unchunk, so it has to
+reverse _chunk exactly.
+"""
+
+import random
+
+import pytest
+
+from src.vector_store import CHUNK_OVERLAP, CHUNK_SIZE, VectorStore
+
+
+def _random_document(rng):
+    """Paragraphs of random words, some longer than a whole chunk."""
+    words = ["flour", "olive", "oil", "25", "kg", "Shelf", "B", "-", "tomatoes", "\n"]
+    paragraphs = []
+    for _ in range(rng.randint(1, 12)):
+        length = rng.choice([5, 50, 300, 800])
+        paragraphs.append(" ".join(rng.choice(words) for _ in range(length)))
+    return "\n\n".join(paragraphs)
+
+
+@pytest.mark.parametrize("overlap", [CHUNK_OVERLAP, 0])
+@pytest.mark.parametrize("seed", range(50))
+def test_unchunk_reverses_chunk(seed, overlap):
+    text = _random_document(random.Random(seed))
+    chunks = VectorStore._chunk(text, overlap=overlap)
+
+    assert all(len(chunk) <= CHUNK_SIZE for chunk in chunks)
+    assert VectorStore._unchunk(chunks, overlap=overlap) == text
+
+
+def test_chunks_overlap_with_previous_tail():
+    text = _random_document(random.Random(1234))
+    chunks = VectorStore._chunk(text)
+
+    assert len(chunks) > 1
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.startswith(previous[-CHUNK_OVERLAP:])
+
+
+def test_short_document_is_one_chunk():
+    text = "OILS AND FATS INVENTORY\n\nOlive oil: 12 litres"
+    assert VectorStore._chunk(text) == [text]
+    assert VectorStore._unchunk([text]) == text